@@ -1,17 +1,30 @@
+import asyncio
+import heapq
 import os
-from typing import List, Optional
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+import aiofiles
 
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from passlib.context import CryptContext
 from pydantic import BaseModel, EmailStr
 from bson import ObjectId
 
-from database import db, create_document
+try:
+    import numpy as np
+except ImportError:  # matching falls back to the pure-Python scorer
+    np = None
+
+from database import db, create_document, create_documents
 from schemas import Student, Internship, MatchRequest
 
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -21,12 +34,73 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+class CachedStaticFiles(StaticFiles):
+    """StaticFiles that lets clients and proxies cache resume downloads.
+
+    Filenames are prefixed with the owner's ObjectId and re-uploads overwrite
+    under a new stat mtime, so FileResponse's own ETag/Last-Modified plus a
+    day of freshness is safe and spares repeat transfers.
+    """
+
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers.setdefault("Cache-Control", "public, max-age=86400")
+        return response
+
 # Static directory for uploaded resumes
 UPLOAD_DIR = os.path.join(os.getcwd(), "uploads")
 os.makedirs(UPLOAD_DIR, exist_ok=True)
-app.mount("/uploads", StaticFiles(directory=UPLOAD_DIR), name="uploads")
+app.mount("/uploads", CachedStaticFiles(directory=UPLOAD_DIR), name="uploads")
+
+# bcrypt cost is the dominant server-side cost of a signin; make it tunable so
+# deployments can benchmark and pick a rounds value matching their CPU budget
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=int(os.getenv("BCRYPT_ROUNDS", "12")),
+)
+
+@app.on_event("startup")
+async def configure_executor():
+    # Bounded pool for CPU-heavy offloads (bcrypt); sized to the host
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=os.cpu_count()))
+
+@app.on_event("startup")
+async def ensure_indexes():
+    if db is None:
+        return
+    try:
+        await db["student"].create_index("email", unique=True)
+        await db["internship"].create_index("skills_lc")
+    except Exception:
+        # Index creation is best-effort; duplicates in legacy data shouldn't stop boot
+        pass
+
+# Skills and preferences are ASCII tags; a 256-entry translate table lowers
+# them in one C loop without Unicode case-folding logic
+_LOWER_TABLE = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+def _lower_ascii(s: str) -> str:
+    return s.translate(_LOWER_TABLE)
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+_prefs_cache: dict = {}  # email -> tuple of lowercased preferences
+
+async def _prefs_for(email: str) -> Tuple[str, ...]:
+    """Cached email -> lowercased preferences lookup (projected, index-backed)."""
+    cached = _prefs_cache.get(email)
+    if cached is not None:
+        return cached
+    doc = await db["student"].find_one({"email": email}, {"preferences": 1, "preferences_lc": 1, "_id": 0})
+    if doc is None:
+        raise KeyError(email)
+    prefs_lc = doc.get("preferences_lc")
+    if prefs_lc is None:  # legacy document without the precomputed field
+        prefs_lc = [_lower_ascii(p) for p in doc.get("preferences", [])]
+    if len(_prefs_cache) >= 4096:
+        _prefs_cache.clear()
+    _prefs_cache[email] = tuple(prefs_lc)
+    return _prefs_cache[email]
 
 class AuthResponse(BaseModel):
     name: str
@@ -38,8 +112,14 @@ class AuthResponse(BaseModel):
 def read_root():
     return {"message": "Inter-India Backend Running"}
 
+# Health checks hammer /test; don't let each one hit the DB for collection
+# names, refresh at most every 30 s
+_collections_cache = (0.0, [])
+_COLLECTIONS_TTL = 30.0
+
 @app.get("/test")
-def test_database():
+async def test_database():
+    global _collections_cache
     response = {
         "backend": "✅ Running",
         "database": "❌ Not Available",
@@ -54,7 +134,11 @@ def test_database():
             response["database_name"] = getattr(db, "name", "✅ Connected")
             response["connection_status"] = "Connected"
             try:
-                response["collections"] = db.list_collection_names()[:10]
+                fetched_at, names = _collections_cache
+                if time.monotonic() - fetched_at >= _COLLECTIONS_TTL:
+                    names = (await db.list_collection_names())[:10]
+                    _collections_cache = (time.monotonic(), names)
+                response["collections"] = names
                 response["database"] = "✅ Connected & Working"
             except Exception as e:
                 response["database"] = f"⚠️ Connected but Error: {str(e)[:50]}"
@@ -68,13 +152,54 @@ def test_database():
 
 # Utility functions
 
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+# Verified against when a signin hits an unknown email, so the response takes
+# one bcrypt op either way and timing doesn't reveal whether an email exists.
+# Hashed once at import; never re-derived per request.
+_DUMMY_HASH = pwd_context.hash("x" * 16)
+
+async def hash_password(password: str) -> str:
+    # bcrypt takes ~100-300 ms; run it in the threadpool so the loop stays free
+    return await asyncio.get_running_loop().run_in_executor(None, pwd_context.hash, password)
+
+async def verify_password(password: str, password_hash: str) -> bool:
+    return await asyncio.get_running_loop().run_in_executor(
+        None, pwd_context.verify, password, password_hash
+    )
+
+async def save_upload(file_path: str, upload: UploadFile) -> None:
+    """Stream an upload to disk in 1 MiB chunks; never buffers the whole file."""
+    async with aiofiles.open(file_path, "wb") as f:
+        while chunk := await upload.read(1 << 20):
+            await f.write(chunk)
 
-def verify_password(password: str, password_hash: str) -> bool:
-    return pwd_context.verify(password, password_hash)
+# Pure login: JSON body, no multipart parsing on the steady-state hot path
+class LoginBody(BaseModel):
+    email: EmailStr
+    password: str
 
-# Auth + Profile (register or sign in + update preferences/resume)
+@app.post("/auth/login", response_model=AuthResponse)
+async def login(body: LoginBody):
+    if db is None:
+        raise HTTPException(status_code=500, detail="Database not configured")
+    user = await db["student"].find_one(
+        {"email": str(body.email)},
+        {"password_hash": 1, "name": 1, "preferences": 1, "resume_url": 1},
+    )
+    if not user:
+        # Same bcrypt cost as the wrong-password path; see _DUMMY_HASH
+        await verify_password(body.password, _DUMMY_HASH)
+        raise HTTPException(status_code=401, detail="Invalid email or password")
+    if not await verify_password(body.password, user.get("password_hash", "")):
+        raise HTTPException(status_code=401, detail="Invalid email or password")
+    return AuthResponse.model_construct(
+        name=user.get("name", ""),
+        email=str(body.email),
+        preferences=user.get("preferences", []),
+        resume_url=user.get("resume_url"),
+    )
+
+# Auth + Profile (register or update preferences/resume; multipart lives here)
+@app.post("/auth/profile", response_model=AuthResponse)
 @app.post("/auth/signin", response_model=AuthResponse)
 async def signin(
     email: EmailStr = Form(...),
@@ -87,7 +212,10 @@ async def signin(
         raise HTTPException(status_code=500, detail="Database not configured")
 
     users = db["student"]
-    user = users.find_one({"email": str(email)})
+    user = await users.find_one(
+        {"email": str(email)},
+        {"password_hash": 1, "name": 1, "preferences": 1, "resume_url": 1},
+    )
 
     pref_list: List[str] = []
     if preferences:
@@ -97,23 +225,25 @@ async def signin(
 
     # If user exists -> verify password and update profile
     if user:
-        if not verify_password(password, user.get("password_hash", "")):
+        if not await verify_password(password, user.get("password_hash", "")):
             raise HTTPException(status_code=401, detail="Invalid email or password")
         update: dict = {}
         if name and name != user.get("name"):
             update["name"] = name
         if pref_list:
             update["preferences"] = pref_list
+            update["preferences_lc"] = [_lower_ascii(p) for p in pref_list]
         if resume is not None:
             file_path = os.path.join(UPLOAD_DIR, f"{user['_id']}_{resume.filename}")
-            with open(file_path, "wb") as f:
-                f.write(await resume.read())
+            await save_upload(file_path, resume)
             resume_url = f"/uploads/{os.path.basename(file_path)}"
             update["resume_url"] = resume_url
         if update:
-            update["updated_at"] = __import__("datetime").datetime.utcnow()
-            users.update_one({"_id": user["_id"]}, {"$set": update})
+            update["updated_at"] = datetime.now(timezone.utc)
+            await users.update_one({"_id": user["_id"]}, {"$set": update})
             user.update(update)
+            if "preferences" in update:
+                _prefs_cache.pop(str(email), None)
         return AuthResponse(
             name=user.get("name", name or ""),
             email=email,
@@ -121,36 +251,103 @@ async def signin(
             resume_url=user.get("resume_url", resume_url),
         )
 
-    # New user -> create
+    # New user -> create (ID generated client-side so resume path and document
+    # land in a single insert instead of insert + update)
     if not name:
+        # Burn the same bcrypt cost as the wrong-password path before rejecting
+        await verify_password(password, _DUMMY_HASH)
         raise HTTPException(status_code=400, detail="Name is required for new users")
-    password_hash = hash_password(password)
+    password_hash = await hash_password(password)
+    new_id = ObjectId()
+
+    file_path = None
+    if resume is not None:
+        file_path = os.path.join(UPLOAD_DIR, f"{new_id}_{resume.filename}")
+        resume_url = f"/uploads/{os.path.basename(file_path)}"
+
     new_user = Student(
         name=name,
         email=email,
         password_hash=password_hash,
         preferences=pref_list,
-        resume_url=None,
+        preferences_lc=[_lower_ascii(p) for p in pref_list],
+        resume_url=resume_url,
         role="student",
     )
-    user_id = create_document("student", new_user)
-
-    if resume is not None:
-        file_path = os.path.join(UPLOAD_DIR, f"{user_id}_{resume.filename}")
-        with open(file_path, "wb") as f:
-            f.write(await resume.read())
-        resume_url = f"/uploads/{os.path.basename(file_path)}"
-        users.update_one({"_id": ObjectId(user_id)}, {"$set": {"resume_url": resume_url}})
+    # The resume write and the insert are independent (the URL is derived from
+    # the pre-generated ID), so run them concurrently
+    async with asyncio.TaskGroup() as tg:
+        if file_path is not None:
+            tg.create_task(save_upload(file_path, resume))
+        tg.create_task(create_document("student", {"_id": new_id, **new_user.model_dump()}))
 
     return AuthResponse(name=name, email=email, preferences=pref_list, resume_url=resume_url)
 
+# Internship catalog cache: skills encoded as packed bitmaps over the skill
+# vocabulary so matching is one vectorized AND + popcount pass. The catalog
+# version lives in a meta document so every worker process sees invalidations
+# from any of them; a projected find_one per request is far cheaper than
+# refetching and re-decoding the whole catalog.
+_internship_cache = None  # (version, docs, skill_to_idx, masks, n_skills)
+
+async def _catalog_version() -> int:
+    meta = await db["meta"].find_one({"_id": "internship_catalog"}, {"version": 1})
+    return meta["version"] if meta else 0
+
+async def _bump_catalog_version():
+    await db["meta"].update_one(
+        {"_id": "internship_catalog"}, {"$inc": {"version": 1}}, upsert=True
+    )
+
+def _inter_size(a, b) -> int:
+    """Intersection size of two sorted lists; no per-call set allocation."""
+    i = j = n = 0
+    while i < len(a) and j < len(b):
+        if a[i] == b[j]:
+            n += 1
+            i += 1
+            j += 1
+        elif a[i] < b[j]:
+            i += 1
+        else:
+            j += 1
+    return n
+
+async def _internship_matrix():
+    global _internship_cache
+    version = await _catalog_version()
+    if _internship_cache is not None and _internship_cache[0] == version:
+        return _internship_cache[1:]
+    docs = await db["internship"].find({}).to_list(length=None)
+    skill_to_idx: dict = {}
+    for d in docs:
+        skills = d.get("skills_lc")
+        if skills is None:  # legacy document without the precomputed field
+            skills = [_lower_ascii(s) for s in d.get("skills", [])]
+        # kept sorted so the no-numpy scorer can walk two pointers
+        d["skills_lc"] = sorted(skills)
+        for s in d["skills_lc"]:
+            skill_to_idx.setdefault(s, len(skill_to_idx))
+    if np is not None:
+        vocab = max(1, len(skill_to_idx))
+        bits = np.zeros((len(docs), vocab), dtype=np.uint8)
+        for row, d in enumerate(docs):
+            for s in d["skills_lc"]:
+                bits[row, skill_to_idx[s]] = 1
+        masks = np.packbits(bits, axis=1)
+        n_skills = np.maximum(1, bits.sum(axis=1))
+    else:
+        masks = n_skills = None
+    _internship_cache = (version, docs, skill_to_idx, masks, n_skills)
+    return docs, skill_to_idx, masks, n_skills
+
 # Seed internships for demo
 @app.post("/seed/internships")
-def seed_internships():
+async def seed_internships():
     if db is None:
         raise HTTPException(status_code=500, detail="Database not configured")
     col = db["internship"]
-    if col.count_documents({}) > 0:
+    if await col.count_documents({}) > 0:
         return {"status": "ok", "message": "Internships already seeded"}
     samples: List[Internship] = [
         Internship(title="Data Analyst Intern", company="Insight Labs", description="Work with data pipelines and dashboards", location="Remote", stipend="₹15,000", skills=["python", "sql", "pandas", "analytics"]),
@@ -160,7 +357,9 @@ def seed_internships():
         Internship(title="Backend Developer Intern", company="CloudStack", description="APIs and microservices", location="Hyderabad", stipend="₹17,000", skills=["python", "fastapi", "mongodb", "docker"]),
     ]
     for s in samples:
-        create_document("internship", s)
+        s.skills_lc = [_lower_ascii(k) for k in s.skills]
+    await create_documents("internship", samples)
+    await _bump_catalog_version()
     return {"status": "ok", "message": "Seeded internships"}
 
 # Matching endpoint
@@ -169,44 +368,80 @@ class MatchResult(BaseModel):
     internship: Internship
 
 @app.post("/match/top", response_model=List[MatchResult])
-def match_top(req: MatchRequest):
+async def match_top(req: MatchRequest):
     if db is None:
         raise HTTPException(status_code=500, detail="Database not configured")
 
-    user = db["student"].find_one({"email": str(req.email)})
-    if not user:
+    try:
+        user_prefs: List[str] = list(await _prefs_for(str(req.email)))
+    except KeyError:
         raise HTTPException(status_code=404, detail="User not found")
-    user_prefs: List[str] = [s.lower() for s in user.get("preferences", [])]
 
-    internships = list(db["internship"].find({}))
+    user_pref_set = frozenset(user_prefs)
+    n_user = max(1, len(user_pref_set))
 
-    def score(intern: dict) -> float:
-        skills = [s.lower() for s in intern.get("skills", [])]
-        if not skills:
-            return 0.0
-        overlap = len(set(skills) & set(user_prefs))
-        pref_cov = overlap / max(1, len(set(user_prefs))) if user_prefs else 0
-        skill_cov = overlap / max(1, len(set(skills)))
+    if np is not None:
+        internships, skill_to_idx, masks, n_skills = await _internship_matrix()
+        user_bits = np.zeros(max(1, len(skill_to_idx)), dtype=np.uint8)
+        for s in user_pref_set:
+            idx = skill_to_idx.get(s)
+            if idx is not None:
+                user_bits[idx] = 1
+        user_mask = np.packbits(user_bits)
+        overlap = np.unpackbits(masks & user_mask, axis=1).sum(axis=1)
         # Weighted: preferences 60%, skill coverage 40%
-        return round(0.6 * pref_cov + 0.4 * skill_cov, 4)
-
-    scored = [
-        MatchResult(score=score(i), internship=Internship(
-            title=i.get("title"),
-            company=i.get("company"),
-            description=i.get("description"),
-            location=i.get("location"),
-            stipend=i.get("stipend"),
-            skills=i.get("skills", []),
+        scores = np.round(0.6 * (overlap / n_user) + 0.4 * (overlap / n_skills), 4)
+        # Partition for the top k, then order just those k
+        k = min(req.limit, len(internships))
+        if k > 0:
+            cand = np.argpartition(scores, len(internships) - k)[-k:]
+            order = cand[np.argsort(scores[cand])[::-1]]
+            winners = [(float(scores[i]), internships[i]) for i in order if scores[i] > 0]
+        else:
+            winners = []
+    else:
+        # Without numpy, walk the cached catalog with a two-pointer merge over
+        # the sorted skill lists: zero allocations per internship, no DB work
+        internships, _, _, _ = await _internship_matrix()
+        user_sorted = sorted(user_pref_set)
+
+        def score(intern: dict) -> float:
+            skills = intern["skills_lc"]
+            if not skills:
+                return 0.0
+            overlap = _inter_size(skills, user_sorted)
+            # Weighted: preferences 60%, skill coverage 40%
+            return round(0.6 * (overlap / n_user) + 0.4 * (overlap / len(skills)), 4)
+
+        scores = [score(d) for d in internships]
+        top = heapq.nlargest(req.limit, enumerate(scores), key=lambda t: t[1])
+        winners = [(s, internships[i]) for i, s in top if s > 0]
+
+    # Winners came straight from our own DB: model_construct skips re-validating
+    # data we already trust, and only the surviving k entries are built at all
+    return [
+        MatchResult.model_construct(score=s, internship=Internship.model_construct(
+            title=doc.get("title"),
+            company=doc.get("company"),
+            description=doc.get("description"),
+            location=doc.get("location"),
+            stipend=doc.get("stipend"),
+            skills=doc.get("skills", []),
         ))
-        for i in internships
+        for s, doc in winners
     ]
 
-    scored.sort(key=lambda x: x.score, reverse=True)
-    top = [s for s in scored if s.score > 0][: req.limit]
-    return top
-
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    # App passed as an import string because multiple workers need to import
+    # it themselves; uvloop + httptools replace the stock loop and h11 parser
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=port,
+        workers=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)),
+        loop="uvloop",
+        http="httptools",
+        log_level="warning",
+    )
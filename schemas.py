@@ -6,6 +6,7 @@ class Student(BaseModel):
     email: EmailStr = Field(..., description="Email address")
     password_hash: str = Field(..., description="BCrypt password hash")
     preferences: List[str] = Field(default_factory=list, description="Preferred skills or domains")
+    preferences_lc: List[str] = Field(default_factory=list, description="Lowercased preferences, precomputed for matching")
     resume_url: Optional[str] = Field(None, description="Public URL for uploaded resume")
     role: str = Field("student", description="Role of the user")
 
@@ -16,7 +17,11 @@ class Internship(BaseModel):
     location: Optional[str] = None
     stipend: Optional[str] = None
     skills: List[str] = Field(default_factory=list, description="Required skills/keywords")
+    skills_lc: List[str] = Field(default_factory=list, description="Lowercased skills, precomputed for matching")
 
 class MatchRequest(BaseModel):
-    email: EmailStr
+    # Plain str: the email is only a lookup key here, and EmailStr's parsing
+    # (regex + IDNA) is wasted work on the hottest endpoint. A malformed
+    # address simply misses in Mongo. Registration keeps full validation.
+    email: str
     limit: int = 5